@@ -23,7 +23,7 @@ logging.basicConfig(
 logger = logging.getLogger("basic_fastmcp_server")
 
 
-@dataclass
+@dataclass(slots=True)
 class ServerContext:
     """Simple context for the server"""
     initialized: bool = True
@@ -49,21 +49,21 @@ mcp = FastMCP(
 @mcp.tool()
 def echo(message: str, ctx: Context = None) -> str:
     """Simple echo tool that returns the input message"""
-    logger.info(f"Echo called with message: {message}")
+    logger.info("Echo called with message: %s", message)
     return f"Echo: {message}"
 
 
 @mcp.tool()
 def add(a: float, b: float, ctx: Context = None) -> float:
     """Add two numbers together"""
-    logger.info(f"Add called with values: {a} and {b}")
+    logger.info("Add called with values: %s and %s", a, b)
     return a + b
 
 
 @mcp.resource("greeting://{name}")
 def greeting(name: str) -> str:
     """A simple greeting resource"""
-    logger.info(f"Greeting resource accessed for: {name}")
+    logger.info("Greeting resource accessed for: %s", name)
     return f"Hello, {name}!"
 
 
@@ -72,7 +72,7 @@ if __name__ == "__main__":
     port = os.environ.get("PORT", "8080")
     os.environ["PORT"] = port
     
-    logger.info(f"Starting server with PORT={port}")
+    logger.info("Starting server with PORT=%s", port)
     
     try:
         # Specify stdio transport for basic testing
@@ -80,6 +80,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("Server shutdown requested via keyboard interrupt")
     except Exception as e:
-        logger.error(f"Error running server: {e}", exc_info=True)
+        logger.error("Error running server: %s", e, exc_info=True)
     finally:
         logger.info("Server stopped") 
\ No newline at end of file
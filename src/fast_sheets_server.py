@@ -5,7 +5,6 @@ This is a test server to verify the FastMCP installation works.
 """
 
 import os
-import json
 import base64
 import logging
 from typing import Any, Dict, List, Optional
@@ -13,6 +12,7 @@ from dataclasses import dataclass
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
 
+import orjson
 import uvicorn
 
 # Direct import from mcp.server.fastmcp
@@ -29,9 +29,11 @@ logger = logging.getLogger("fast_sheets_server")
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
 SERVICE_ACCOUNT_PATH = os.environ.get("SERVICE_ACCOUNT_PATH", "service_account.json")
 DRIVE_FOLDER_ID = os.environ.get("DRIVE_FOLDER_ID", "")
+MCP_TRANSPORT = os.environ.get("MCP_TRANSPORT", "sse")
+WORKERS = int(os.environ.get("WORKERS", os.cpu_count() or 1))
 
 # Dataclass for the service context
-@dataclass
+@dataclass(slots=True)
 class SpreadsheetContext:
     """Context for Spreadsheet service"""
     sheets_service: Any = None
@@ -51,55 +53,86 @@ async def spreadsheet_lifespan(server: FastMCP) -> AsyncIterator[SpreadsheetCont
 # Create the FastMCP server
 mcp = FastMCP(
     "Google Sheets Test",
-    dependencies=["google-auth", "google-auth-oauthlib", "google-api-python-client"],
+    dependencies=["google-auth", "google-auth-oauthlib", "google-api-python-client", "orjson", "uvloop"],
     lifespan=spreadsheet_lifespan,
 )
 
+def _to_json(payload: Dict[str, Any]) -> str:
+    """Encode a tool result up front so FastMCP sends it as-is instead of re-serializing it"""
+    return orjson.dumps(payload).decode()
+
 # Define tools
-@mcp.tool()
-def create_spreadsheet(title: str, sheets: Optional[List[str]] = None, ctx: Context = None) -> Dict[str, Any]:
+@mcp.tool(structured_output=False)
+def create_spreadsheet(title: str, sheets: Optional[List[str]] = None, ctx: Context = None) -> str:
     """Create a new spreadsheet, optionally within configured Drive folder."""
-    logger.info(f"Creating spreadsheet with title: {title}")
+    logger.info("Creating spreadsheet with title: %s", title)
     # Just return a dummy response for testing
-    return {
+    return _to_json({
         "success": True,
         "spreadsheet_id": "1234567890abcdefgh",
         "title": title,
         "sheets": sheets or ["Sheet1"],
         "url": f"https://docs.google.com/spreadsheets/d/1234567890abcdefgh/edit"
-    }
+    })
 
-@mcp.tool()
-def get_spreadsheet(spreadsheet_id: str, ctx: Context = None) -> Dict[str, Any]:
+@mcp.tool(structured_output=False)
+def get_spreadsheet(spreadsheet_id: str, ctx: Context = None) -> str:
     """Get a spreadsheet by ID."""
-    logger.info(f"Getting spreadsheet with ID: {spreadsheet_id}")
+    logger.info("Getting spreadsheet with ID: %s", spreadsheet_id)
     # Return dummy response
-    return {
+    return _to_json({
         "spreadsheet_id": spreadsheet_id,
         "title": "Test Spreadsheet",
         "sheets": ["Sheet1", "Sheet2"],
         "url": f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}/edit"
-    }
+    })
+
+def create_app():
+    """Build the streamable-http ASGI app; uvicorn calls this once in each worker process"""
+    # Workers don't share session state, so every request has to stand on its own
+    mcp.settings.stateless_http = True
+    return mcp.streamable_http_app()
 
 # Main entry point
 if __name__ == "__main__":
     # Get port from environment or use default
     port = int(os.environ.get("PORT", 8001))
     
-    # Force the correct port for SSE transport
-    os.environ["PORT"] = str(port)
+    # FastMCP's SSE transport binds to its own settings, not PORT
+    mcp.settings.port = port
+
+    # Uvicorn picks up whichever event loop policy is installed; uvloop is
+    # unavailable on Windows, so fall back to the default asyncio loop there
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        logger.info("uvloop not available, using default asyncio event loop")
     
-    logger.info(f"Starting FastMCP server on port {port}...")
+    logger.info("Starting FastMCP server on port %s...", port)
     try:
-        # For a FastAPI-compatible server, we need to use 'sse' transport 
-        # which will create a Starlette-compatible app internally
-        mcp.run(transport="sse")
+        if MCP_TRANSPORT == "streamable-http":
+            # Run several worker processes so CPU-bound work isn't serialized on
+            # one GIL; uvicorn needs an import string (an app factory here) to fork them
+            uvicorn.run(
+                "fast_sheets_server:create_app",
+                factory=True,
+                host="0.0.0.0",
+                port=port,
+                workers=WORKERS,
+                log_level="warning",
+                access_log=False,
+            )
+        else:
+            # Uvicorn inherits FastMCP's log level; at WARNING it skips the
+            # per-request access log lines
+            mcp.settings.log_level = "WARNING"
+            # For a FastAPI-compatible server, we need to use 'sse' transport 
+            # which will create a Starlette-compatible app internally
+            mcp.run(transport="sse")
     except KeyboardInterrupt:
         logger.info("Server shutdown requested via keyboard interrupt")
     except Exception as e:
-        logger.error(f"Error running server: {e}", exc_info=True)
+        logger.error("Error running server: %s", e, exc_info=True)
     finally:
-        logger.info("Server stopped")
-    
-    # Note: You could also use streamable-http transport
-    # mcp.run(transport="streamable-http") 
\ No newline at end of file
+        logger.info("Server stopped") 
\ No newline at end of file
@@ -1,154 +1,126 @@
 from __future__ import annotations
 
-import base64
-import json
-import os
 from typing import Any, Dict, List, Optional
 from dataclasses import dataclass
-from contextlib import asynccontextmanager
-from collections.abc import AsyncIterator
 
 from mcp.server.fastmcp import FastMCP, Context
 
-from google.oauth2.credentials import Credentials
-from google.oauth2 import service_account
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-
-from services.calendar.app.google_calendar import (
-    create_calendar as _create_calendar_impl,
-    get_calendar as _get_calendar_impl,
-    update_calendar as _update_calendar_impl,
-    delete_calendar as _delete_calendar_impl,
-    list_calendars as _list_calendars_impl,
-    share_calendar as _share_calendar_impl,
-    create_event as _create_event_impl,
-    get_event as _get_event_impl,
-    update_event as _update_event_impl,
-    delete_event as _delete_event_impl,
-    list_events as _list_events_impl,
-    quick_add_event as _quick_add_impl,
-    move_event as _move_event_impl,
-    import_event as _import_event_impl,
-    check_free_busy as _check_free_busy_impl,
-)
+from mcp_google_shared.auth import make_lifespan
+from mcp_google_shared.tools import make_impl_loader
+
+_IMPL_MODULE = "services.calendar.app.google_calendar"
+
+SCOPES = ("https://www.googleapis.com/auth/calendar",)
 
-SCOPES = ["https://www.googleapis.com/auth/calendar"]
-CREDENTIALS_CONFIG = os.environ.get("CREDENTIALS_CONFIG")
-TOKEN_PATH = os.environ.get("TOKEN_PATH", "token.json")
-CREDENTIALS_PATH = os.environ.get("CREDENTIALS_PATH", "credentials.json")
-SERVICE_ACCOUNT_PATH = os.environ.get("SERVICE_ACCOUNT_PATH", "service_account.json")
 
+_impl = make_impl_loader(_IMPL_MODULE)
 
-@dataclass
+
+@dataclass(slots=True)
 class CalendarContext:
     calendar_service: Any
 
 
-@asynccontextmanager
-async def calendar_lifespan(server: FastMCP) -> AsyncIterator[CalendarContext]:
-    creds = None
-    if CREDENTIALS_CONFIG:
-        creds = service_account.Credentials.from_service_account_info(
-            json.loads(base64.b64decode(CREDENTIALS_CONFIG)), SCOPES)
-
-    if SERVICE_ACCOUNT_PATH and os.path.exists(SERVICE_ACCOUNT_PATH):
-        try:
-            creds = service_account.Credentials.from_service_account_file(
-                SERVICE_ACCOUNT_PATH, scopes=SCOPES)
-            print("Using service account authentication (Calendar)")
-        except Exception as e:
-            print(f"Service account auth failed: {e}")
-            creds = None
-
-    if not creds:
-        if os.path.exists(TOKEN_PATH):
-            with open(TOKEN_PATH, "r") as token_file:
-                creds = Credentials.from_authorized_user_info(json.load(token_file), SCOPES)
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
-                creds = flow.run_local_server(port=0)
-            with open(TOKEN_PATH, "w") as token_file:
-                token_file.write(creds.to_json())
-
-    calendar_service = build("calendar", "v3", credentials=creds)
-    try:
-        yield CalendarContext(calendar_service=calendar_service)
-    finally:
-        pass
+calendar_lifespan = make_lifespan([("calendar_service", "calendar", "v3", SCOPES)], CalendarContext)
 
 
 mcp = FastMCP(
     "Google Calendar",
-    dependencies=["google-auth", "google-auth-oauthlib", "google-api-python-client"],
+    dependencies=["google-auth", "google-auth-oauthlib", "google-api-python-client", "orjson"],
     lifespan=calendar_lifespan,
 )
 
 # Calendar tools
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def calendar_create(summary: str, description: Optional[str] = None, location: Optional[str] = None, time_zone: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _create_calendar_impl(summary=summary, description=description, location=location, time_zone=time_zone)
+    return _impl("create_calendar")(summary=summary, description=description, location=location, time_zone=time_zone)
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def calendar_get(calendar_id: str, ctx: Context = None) -> Dict[str, Any]:
-    return _get_calendar_impl(calendar_id=calendar_id)
+    return _impl("get_calendar")(calendar_id=calendar_id)
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def calendar_update(calendar_id: str, summary: Optional[str] = None, description: Optional[str] = None, location: Optional[str] = None, time_zone: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _update_calendar_impl(calendar_id=calendar_id, summary=summary, description=description, location=location, time_zone=time_zone)
+    return _impl("update_calendar")(calendar_id=calendar_id, summary=summary, description=description, location=location, time_zone=time_zone)
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def calendar_delete(calendar_id: str, ctx: Context = None) -> Dict[str, Any]:
-    return _delete_calendar_impl(calendar_id=calendar_id)
+    return _impl("delete_calendar")(calendar_id=calendar_id)
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def calendar_list(show_hidden: bool = False, min_access_role: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _list_calendars_impl(show_hidden=show_hidden, min_access_role=min_access_role)
+    return _impl("list_calendars")(show_hidden=show_hidden, min_access_role=min_access_role)
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def calendar_share(calendar_id: str, scope_type: str, role: str, scope_value: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _share_calendar_impl(calendar_id=calendar_id, scope_type=scope_type, role=role, scope_value=scope_value)
+    return _impl("share_calendar")(calendar_id=calendar_id, scope_type=scope_type, role=role, scope_value=scope_value)
 
 # Event tools
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def event_create(calendar_id: str, summary: str, start: Dict[str, Any], end: Dict[str, Any], ctx: Context = None, **kwargs) -> Dict[str, Any]:
-    return _create_event_impl(calendar_id=calendar_id, summary=summary, start=start, end=end, **kwargs)
+    return _impl("create_event")(calendar_id=calendar_id, summary=summary, start=start, end=end, **kwargs)
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def event_get(calendar_id: str, event_id: str, time_zone: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _get_event_impl(calendar_id=calendar_id, event_id=event_id, time_zone=time_zone)
+    return _impl("get_event")(calendar_id=calendar_id, event_id=event_id, time_zone=time_zone)
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def event_update(calendar_id: str, event_id: str, ctx: Context = None, **kwargs) -> Dict[str, Any]:
-    return _update_event_impl(calendar_id=calendar_id, event_id=event_id, **kwargs)
+    return _impl("update_event")(calendar_id=calendar_id, event_id=event_id, **kwargs)
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def event_delete(calendar_id: str, event_id: str, send_notifications: bool = False, ctx: Context = None) -> Dict[str, Any]:
-    return _delete_event_impl(calendar_id=calendar_id, event_id=event_id, send_notifications=send_notifications)
+    return _impl("delete_event")(calendar_id=calendar_id, event_id=event_id, send_notifications=send_notifications)
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def event_list(calendar_id: str, ctx: Context = None, **kwargs) -> Dict[str, Any]:
-    return _list_events_impl(calendar_id=calendar_id, **kwargs)
+    return _impl("list_events")(calendar_id=calendar_id, **kwargs)
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def event_quick_add(calendar_id: str, text: str, send_notifications: bool = False, ctx: Context = None) -> Dict[str, Any]:
-    return _quick_add_impl(calendar_id=calendar_id, text=text, send_notifications=send_notifications)
+    return _impl("quick_add_event")(calendar_id=calendar_id, text=text, send_notifications=send_notifications)
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def event_move(source_calendar_id: str, destination_calendar_id: str, event_id: str, send_notifications: bool = False, ctx: Context = None) -> Dict[str, Any]:
-    return _move_event_impl(source_calendar_id=source_calendar_id, destination_calendar_id=destination_calendar_id, event_id=event_id, send_notifications=send_notifications)
+    return _impl("move_event")(source_calendar_id=source_calendar_id, destination_calendar_id=destination_calendar_id, event_id=event_id, send_notifications=send_notifications)
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def event_import(calendar_id: str, ical_data: str, send_notifications: bool = False, ctx: Context = None) -> Dict[str, Any]:
-    return _import_event_impl(calendar_id=calendar_id, ical_data=ical_data, send_notifications=send_notifications)
+    return _impl("import_event")(calendar_id=calendar_id, ical_data=ical_data, send_notifications=send_notifications)
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 def calendar_free_busy(time_min: str, time_max: str, calendar_ids: List[str], time_zone: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _check_free_busy_impl(time_min=time_min, time_max=time_max, calendar_ids=calendar_ids, time_zone=time_zone)
+    return _impl("check_free_busy")(time_min=time_min, time_max=time_max, calendar_ids=calendar_ids, time_zone=time_zone)
+
+
+# Direct dispatch table for in-process callers (e.g. a proxy embedding this
+# server) so they can skip the MCP transport and call the implementations
+_TOOL_REGISTRY: Dict[str, str] = {
+    "calendar_create": "create_calendar",
+    "calendar_get": "get_calendar",
+    "calendar_update": "update_calendar",
+    "calendar_delete": "delete_calendar",
+    "calendar_list": "list_calendars",
+    "calendar_share": "share_calendar",
+    "event_create": "create_event",
+    "event_get": "get_event",
+    "event_update": "update_event",
+    "event_delete": "delete_event",
+    "event_list": "list_events",
+    "event_quick_add": "quick_add_event",
+    "event_move": "move_event",
+    "event_import": "import_event",
+    "calendar_free_busy": "check_free_busy",
+}
+
+
+def call_tool_direct(name: str, **kwargs: Any) -> Dict[str, Any]:
+    """Call a calendar tool by name in-process, bypassing the MCP request pipeline."""
+    try:
+        impl_name = _TOOL_REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown calendar tool: {name}") from None
+    return _impl(impl_name)(**kwargs)
 
 
 def main():
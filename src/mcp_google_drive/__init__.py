@@ -1,131 +1,173 @@
 from __future__ import annotations
 
-import base64
-import json
-import os
-from typing import Any, Dict, List, Optional
+import asyncio
+import threading
+from typing import Any, Callable, Dict, List, Optional
 from dataclasses import dataclass
-from contextlib import asynccontextmanager
-from collections.abc import AsyncIterator
 
 from mcp.server.fastmcp import FastMCP, Context
 
-from google.oauth2.credentials import Credentials
-from google.oauth2 import service_account
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-
-from services.drive.app.google_drive import (
-    search_files as _search_files_impl,
-    create_folder as _create_folder_impl,
-    upload_file as _upload_file_impl,
-    move_file as _move_file_impl,
-    rename_file as _rename_file_impl,
-    delete_file as _delete_file_impl,
-    get_file_content as _get_file_content_impl,
-    share_file as _share_file_impl,
-    get_file_metadata as _get_file_metadata_impl,
-)
+from mcp_google_shared.auth import get_credentials, make_lifespan, run_batch
+from mcp_google_shared.tools import make_impl_loader
+
+_IMPL_MODULE = "services.drive.app.google_drive"
+
+SCOPES = ("https://www.googleapis.com/auth/drive",)
+
+
+_impl = make_impl_loader(_IMPL_MODULE)
+
+# services.drive calls Drive through its own service, whose httplib2.Http is
+# not thread-safe, so implementation calls take turns in the worker threads
+_IMPL_LOCK = threading.Lock()
+
 
-SCOPES = ["https://www.googleapis.com/auth/drive"]
-CREDENTIALS_CONFIG = os.environ.get("CREDENTIALS_CONFIG")
-TOKEN_PATH = os.environ.get("TOKEN_PATH", "token.json")
-CREDENTIALS_PATH = os.environ.get("CREDENTIALS_PATH", "credentials.json")
-SERVICE_ACCOUNT_PATH = os.environ.get("SERVICE_ACCOUNT_PATH", "service_account.json")
+def _call_impl(name: str, **kwargs: Any) -> Dict[str, Any]:
+    with _IMPL_LOCK:
+        return _impl(name)(**kwargs)
 
 
-@dataclass
+@dataclass(slots=True)
 class DriveContext:
     drive_service: Any
 
 
-@asynccontextmanager
-async def drive_lifespan(server: FastMCP) -> AsyncIterator[DriveContext]:
-    creds = None
-    if CREDENTIALS_CONFIG:
-        creds = service_account.Credentials.from_service_account_info(
-            json.loads(base64.b64decode(CREDENTIALS_CONFIG)), SCOPES)
-
-    if SERVICE_ACCOUNT_PATH and os.path.exists(SERVICE_ACCOUNT_PATH):
-        try:
-            creds = service_account.Credentials.from_service_account_file(
-                SERVICE_ACCOUNT_PATH, scopes=SCOPES)
-            print("Using service account authentication (Drive)")
-        except Exception as e:
-            print(f"Service account auth failed: {e}")
-            creds = None
-
-    if not creds:
-        if os.path.exists(TOKEN_PATH):
-            with open(TOKEN_PATH, "r") as token_file:
-                creds = Credentials.from_authorized_user_info(json.load(token_file), SCOPES)
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
-                creds = flow.run_local_server(port=0)
-            with open(TOKEN_PATH, "w") as token_file:
-                token_file.write(creds.to_json())
-
-    drive_service = build("drive", "v3", credentials=creds)
-    try:
-        yield DriveContext(drive_service=drive_service)
-    finally:
-        pass
+drive_lifespan = make_lifespan([("drive_service", "drive", "v3", SCOPES)], DriveContext)
 
 
 mcp = FastMCP(
     "Google Drive",
-    dependencies=["google-auth", "google-auth-oauthlib", "google-api-python-client"],
+    dependencies=["google-auth", "google-auth-oauthlib", "google-api-python-client", "orjson"],
     lifespan=drive_lifespan,
 )
 
 
-@mcp.tool()
-def search_files(query: str, page_size: int = 100, page_token: Optional[str] = None, order_by: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _search_files_impl(q=query, page_size=page_size, page_token=page_token, order_by=order_by)
+@mcp.tool(structured_output=False)
+async def search_files(query: str, page_size: int = 100, page_token: Optional[str] = None, order_by: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
+    return await asyncio.to_thread(_call_impl, "search_files", q=query, page_size=page_size, page_token=page_token, order_by=order_by)
+
+
+@mcp.tool(structured_output=False)
+async def create_folder(name: str, parent_id: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
+    return await asyncio.to_thread(_call_impl, "create_folder", name=name, parent_id=parent_id)
+
+
+@mcp.tool(structured_output=False)
+async def upload_file(name: str, mime_type: str, content_base64: str, parent_id: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
+    return await asyncio.to_thread(_call_impl, "upload_file", name=name, mime_type=mime_type, content_base64=content_base64, parent_id=parent_id)
+
 
+@mcp.tool(structured_output=False)
+async def move_file(file_id: str, new_parent_id: str, ctx: Context = None) -> Dict[str, Any]:
+    return await asyncio.to_thread(_call_impl, "move_file", file_id=file_id, new_parent_id=new_parent_id)
 
-@mcp.tool()
-def create_folder(name: str, parent_id: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _create_folder_impl(name=name, parent_id=parent_id)
 
+@mcp.tool(structured_output=False)
+async def rename_file(file_id: str, new_name: str, ctx: Context = None) -> Dict[str, Any]:
+    return await asyncio.to_thread(_call_impl, "rename_file", file_id=file_id, new_name=new_name)
 
-@mcp.tool()
-def upload_file(name: str, mime_type: str, content_base64: str, parent_id: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _upload_file_impl(name=name, mime_type=mime_type, content_base64=content_base64, parent_id=parent_id)
 
+@mcp.tool(structured_output=False)
+async def delete_file(file_id: str, ctx: Context = None) -> Dict[str, Any]:
+    return await asyncio.to_thread(_call_impl, "delete_file", file_id=file_id)
 
-@mcp.tool()
-def move_file(file_id: str, new_parent_id: str, ctx: Context = None) -> Dict[str, Any]:
-    return _move_file_impl(file_id=file_id, new_parent_id=new_parent_id)
 
+@mcp.tool(structured_output=False)
+async def get_file_content(file_id: str, ctx: Context = None) -> Dict[str, Any]:
+    return await asyncio.to_thread(_call_impl, "get_file_content", file_id=file_id)
 
-@mcp.tool()
-def rename_file(file_id: str, new_name: str, ctx: Context = None) -> Dict[str, Any]:
-    return _rename_file_impl(file_id=file_id, new_name=new_name)
 
+@mcp.tool(structured_output=False)
+async def share_file(file_id: str, recipients: List[Dict[str, str]], send_notification: bool = False, ctx: Context = None) -> Dict[str, Any]:
+    return await asyncio.to_thread(_call_impl, "share_file", file_id=file_id, permissions=recipients, send_notification=send_notification)
 
-@mcp.tool()
-def delete_file(file_id: str, ctx: Context = None) -> Dict[str, Any]:
-    return _delete_file_impl(file_id=file_id)
 
+@mcp.tool(structured_output=False)
+async def get_file_metadata(file_id: str, ctx: Context = None) -> Dict[str, Any]:
+    return await asyncio.to_thread(_call_impl, "get_file_metadata", file_id=file_id)
 
-@mcp.tool()
-def get_file_content(file_id: str, ctx: Context = None) -> Dict[str, Any]:
-    return _get_file_content_impl(file_id=file_id)
 
+def _batch_create_folder(drive_service: Any, name: str, parent_id: Optional[str] = None) -> List[Any]:
+    body = {"name": name, "mimeType": "application/vnd.google-apps.folder"}
+    if parent_id:
+        body["parents"] = [parent_id]
+    return [drive_service.files().create(body=body, fields="id, name, parents")]
 
-@mcp.tool()
-def share_file(file_id: str, recipients: List[Dict[str, str]], send_notification: bool = False, ctx: Context = None) -> Dict[str, Any]:
-    return _share_file_impl(file_id=file_id, permissions=recipients, send_notification=send_notification)
 
+def _batch_move_file(drive_service: Any, file_id: str, new_parent_id: str, old_parent_id: str) -> List[Any]:
+    # Drive allows one parent per item, so a move has to detach the old one in the same update
+    return [drive_service.files().update(fileId=file_id, addParents=new_parent_id, removeParents=old_parent_id, fields="id, name, parents")]
 
-@mcp.tool()
-def get_file_metadata(file_id: str, ctx: Context = None) -> Dict[str, Any]:
-    return _get_file_metadata_impl(file_id=file_id)
+
+def _batch_rename_file(drive_service: Any, file_id: str, new_name: str) -> List[Any]:
+    return [drive_service.files().update(fileId=file_id, body={"name": new_name}, fields="id, name")]
+
+
+def _batch_delete_file(drive_service: Any, file_id: str) -> List[Any]:
+    return [drive_service.files().delete(fileId=file_id)]
+
+
+def _batch_get_file_metadata(drive_service: Any, file_id: str) -> List[Any]:
+    return [drive_service.files().get(fileId=file_id, fields="*")]
+
+
+def _batch_create_permissions(drive_service: Any, file_id: str, permissions: List[Dict[str, Any]], send_notification: bool = False) -> List[Any]:
+    # One permissions.create per permission; they all travel in the same batch
+    return [
+        drive_service.permissions().create(fileId=file_id, body=permission, sendNotificationEmail=send_notification, fields="id, type, role, emailAddress")
+        for permission in permissions
+    ]
+
+
+_BATCH_OPS: Dict[str, Callable[..., List[Any]]] = {
+    "create_folder": _batch_create_folder,
+    "move_file": _batch_move_file,
+    "rename_file": _batch_rename_file,
+    "delete_file": _batch_delete_file,
+    "get_file_metadata": _batch_get_file_metadata,
+    "create_permissions": _batch_create_permissions,
+}
+
+
+def _run_drive_batch(drive_service: Any, ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    requests = {}
+    for index, op in enumerate(ops):
+        try:
+            build_requests = _BATCH_OPS[op["tool"]]
+        except KeyError:
+            raise ValueError(f"Unsupported batch operation: {op.get('tool')}") from None
+        try:
+            op_requests = build_requests(drive_service, **op.get("args", {}))
+        except TypeError as e:
+            raise ValueError(f"Invalid arguments for batch operation {op['tool']}: {e}") from None
+        for sub_index, request in enumerate(op_requests):
+            requests[f"{index}-{sub_index}"] = request
+
+    responses, errors = run_batch(drive_service, requests, get_credentials(SCOPES))
+
+    results = [{"tool": op["tool"], "results": [], "errors": []} for op in ops]
+    for request_id in requests:
+        index = int(request_id.split("-", 1)[0])
+        if request_id in errors:
+            results[index]["errors"].append(errors[request_id])
+        else:
+            results[index]["results"].append(responses.get(request_id))
+    return results
+
+
+@mcp.tool(structured_output=False)
+async def drive_batch(ops: List[Dict[str, Any]], ctx: Context = None) -> Dict[str, Any]:
+    """Run several Drive operations in as few HTTP round trips as possible.
+
+    Each op is {"tool": name, "args": {...}} where name is one of create_folder,
+    move_file (args must include old_parent_id, the folder the file leaves),
+    rename_file, delete_file, get_file_metadata or create_permissions (args are
+    file_id and permissions, a list of Drive permission resources, plus an
+    optional send_notification). Up to 100 sub-requests share one batch call.
+    """
+    drive_service = ctx.request_context.lifespan_context.drive_service
+    results = await asyncio.to_thread(_run_drive_batch, drive_service, ops)
+    return {"success": all(not r["errors"] for r in results), "results": results}
 
 
 def main():  # pragma: no cover
@@ -1,166 +1,113 @@
 from __future__ import annotations
 
-import base64
-import json
-import os
+import asyncio
 from typing import Any, Dict, List, Optional
 from dataclasses import dataclass
-from contextlib import asynccontextmanager
-from collections.abc import AsyncIterator
 
 from mcp.server.fastmcp import FastMCP, Context
 
-from google.oauth2.credentials import Credentials
-from google.oauth2 import service_account
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-
-from services.gmail.app.google_gmail import (
-    get_message as _get_message_impl,
-    list_messages as _list_messages_impl,
-    send_message as _send_message_impl,
-    reply_to_message as _reply_impl,
-    forward_message as _forward_impl,
-    get_attachment as _get_attachment_impl,
-    list_labels as _list_labels_impl,
-    create_label as _create_label_impl,
-    update_label as _update_label_impl,
-    delete_label as _delete_label_impl,
-    get_thread as _get_thread_impl,
-    list_threads as _list_threads_impl,
-    batch_modify_messages as _batch_modify_impl,
-    batch_delete_messages as _batch_delete_impl,
-)
+from mcp_google_shared.auth import get_credentials, make_lifespan, run_batch
+from mcp_google_shared.tools import make_impl_loader, register_forwarders
+
+_IMPL_MODULE = "services.gmail.app.google_gmail"
 
-SCOPES = [
+SCOPES = (
+    "https://www.googleapis.com/auth/gmail.compose",
     "https://www.googleapis.com/auth/gmail.modify",
     "https://www.googleapis.com/auth/gmail.readonly",
     "https://www.googleapis.com/auth/gmail.send",
-    "https://www.googleapis.com/auth/gmail.compose",
-]
-CREDENTIALS_CONFIG = os.environ.get("CREDENTIALS_CONFIG")
-TOKEN_PATH = os.environ.get("TOKEN_PATH", "token.json")
-CREDENTIALS_PATH = os.environ.get("CREDENTIALS_PATH", "credentials.json")
-SERVICE_ACCOUNT_PATH = os.environ.get("SERVICE_ACCOUNT_PATH", "service_account.json")
+)
 
 
-@dataclass
+_impl = make_impl_loader(_IMPL_MODULE)
+
+
+@dataclass(slots=True)
 class GmailContext:
     gmail_service: Any
 
 
-@asynccontextmanager
-async def gmail_lifespan(server: FastMCP) -> AsyncIterator[GmailContext]:
-    creds = None
-    if CREDENTIALS_CONFIG:
-        creds = service_account.Credentials.from_service_account_info(
-            json.loads(base64.b64decode(CREDENTIALS_CONFIG)), SCOPES)
-
-    if SERVICE_ACCOUNT_PATH and os.path.exists(SERVICE_ACCOUNT_PATH):
-        try:
-            creds = service_account.Credentials.from_service_account_file(
-                SERVICE_ACCOUNT_PATH, scopes=SCOPES)
-            print("Using service account authentication (Gmail)")
-        except Exception as e:
-            print(f"Service account auth failed: {e}")
-            creds = None
-
-    if not creds:
-        if os.path.exists(TOKEN_PATH):
-            with open(TOKEN_PATH, "r") as token_file:
-                creds = Credentials.from_authorized_user_info(json.load(token_file), SCOPES)
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
-                creds = flow.run_local_server(port=0)
-            with open(TOKEN_PATH, "w") as token_file:
-                token_file.write(creds.to_json())
-
-    gmail_service = build("gmail", "v1", credentials=creds)
-    try:
-        yield GmailContext(gmail_service=gmail_service)
-    finally:
-        pass
+gmail_lifespan = make_lifespan([("gmail_service", "gmail", "v1", SCOPES)], GmailContext)
 
 
 mcp = FastMCP(
     "Google Gmail",
-    dependencies=["google-auth", "google-auth-oauthlib", "google-api-python-client"],
+    dependencies=["google-auth", "google-auth-oauthlib", "google-api-python-client", "orjson"],
     lifespan=gmail_lifespan,
 )
 
 
-@mcp.tool()
-def gmail_get_message(message_id: str, format: str = "full", ctx: Context = None) -> Dict[str, Any]:
-    return _get_message_impl(message_id=message_id, format=format)
-
-
-@mcp.tool()
-def gmail_list_messages(query: Optional[str] = None, label_ids: Optional[List[str]] = None, include_spam_trash: bool = False, page_size: int = 20, page_token: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _list_messages_impl(query=query, label_ids=label_ids, include_spam_trash=include_spam_trash, page_size=page_size, page_token=page_token)
-
-
-@mcp.tool()
-def gmail_send_message(to: List[str], subject: str, body: str, cc: Optional[List[str]] = None, bcc: Optional[List[str]] = None, is_html: bool = False, attachments: Optional[List[Dict[str, Any]]] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _send_message_impl(to=to, subject=subject, body=body, cc=cc, bcc=bcc, is_html=is_html, attachments=attachments)
-
-
-@mcp.tool()
-def gmail_reply(message_id: str, body: str, is_html: bool = False, attachments: Optional[List[Dict[str, Any]]] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _reply_impl(message_id=message_id, body=body, is_html=is_html, attachments=attachments)
-
-
-@mcp.tool()
-def gmail_forward(message_id: str, to: List[str], body: Optional[str] = None, cc: Optional[List[str]] = None, bcc: Optional[List[str]] = None, is_html: bool = False, ctx: Context = None) -> Dict[str, Any]:
-    return _forward_impl(message_id=message_id, to=to, body=body, cc=cc, bcc=bcc, is_html=is_html)
-
-
-@mcp.tool()
-def gmail_get_attachment(message_id: str, attachment_id: str, ctx: Context = None) -> Dict[str, Any]:
-    return _get_attachment_impl(message_id=message_id, attachment_id=attachment_id)
-
-
-@mcp.tool()
-def gmail_list_labels(ctx: Context = None) -> Dict[str, Any]:
-    return _list_labels_impl()
-
+# Tools that pass their arguments straight through to the service implementation
+_TOOLS = [
+    ("gmail_get_message", "get_message", "message_id: str, format: str = 'full'"),
+    ("gmail_list_messages", "list_messages", "query: Optional[str] = None, label_ids: Optional[List[str]] = None, include_spam_trash: bool = False, page_size: int = 20, page_token: Optional[str] = None"),
+    ("gmail_send_message", "send_message", "to: List[str], subject: str, body: str, cc: Optional[List[str]] = None, bcc: Optional[List[str]] = None, is_html: bool = False, attachments: Optional[List[Dict[str, Any]]] = None"),
+    ("gmail_reply", "reply_to_message", "message_id: str, body: str, is_html: bool = False, attachments: Optional[List[Dict[str, Any]]] = None"),
+    ("gmail_forward", "forward_message", "message_id: str, to: List[str], body: Optional[str] = None, cc: Optional[List[str]] = None, bcc: Optional[List[str]] = None, is_html: bool = False"),
+    ("gmail_get_attachment", "get_attachment", "message_id: str, attachment_id: str"),
+    ("gmail_list_labels", "list_labels", ""),
+    ("gmail_create_label", "create_label", "name: str, message_list_visibility: str = 'show', label_list_visibility: str = 'labelShow', color: Optional[Dict[str, Any]] = None"),
+    ("gmail_update_label", "update_label", "label_id: str, name: Optional[str] = None, message_list_visibility: Optional[str] = None, label_list_visibility: Optional[str] = None, color: Optional[Dict[str, Any]] = None"),
+    ("gmail_delete_label", "delete_label", "label_id: str"),
+    ("gmail_get_thread", "get_thread", "thread_id: str, format: str = 'full'"),
+    ("gmail_list_threads", "list_threads", "query: Optional[str] = None, label_ids: Optional[List[str]] = None, include_spam_trash: bool = False, page_size: int = 20, page_token: Optional[str] = None"),
+    ("gmail_batch_modify", "batch_modify_messages", "message_ids: List[str], add_label_ids: Optional[List[str]] = None, remove_label_ids: Optional[List[str]] = None"),
+    ("gmail_batch_delete", "batch_delete_messages", "message_ids: List[str]"),
+]
 
-@mcp.tool()
-def gmail_create_label(name: str, message_list_visibility: str = "show", label_list_visibility: str = "labelShow", color: Optional[Dict[str, Any]] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _create_label_impl(name=name, message_list_visibility=message_list_visibility, label_list_visibility=label_list_visibility, color=color)
+register_forwarders(mcp, _impl, _TOOLS)
 
 
-@mcp.tool()
-def gmail_update_label(label_id: str, name: Optional[str] = None, message_list_visibility: Optional[str] = None, label_list_visibility: Optional[str] = None, color: Optional[Dict[str, Any]] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _update_label_impl(label_id=label_id, name=name, message_list_visibility=message_list_visibility, label_list_visibility=label_list_visibility, color=color)
+def _run_batch_get(gmail_service: Any, message_ids: List[str], format: str, fields: Optional[str]) -> List[Dict[str, Any]]:
+    requests = {
+        str(index): gmail_service.users().messages().get(userId="me", id=message_id, format=format, fields=fields)
+        for index, message_id in enumerate(message_ids)
+    }
+    responses, errors = run_batch(gmail_service, requests, get_credentials(SCOPES))
 
+    return [
+        {"id": message_id, "error": errors[str(index)]} if str(index) in errors else responses.get(str(index))
+        for index, message_id in enumerate(message_ids)
+    ]
 
-@mcp.tool()
-def gmail_delete_label(label_id: str, ctx: Context = None) -> Dict[str, Any]:
-    return _delete_label_impl(label_id=label_id)
 
+def _run_batch_get_attachments(gmail_service: Any, items: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    attachments = gmail_service.users().messages().attachments()
+    requests = {
+        str(index): attachments.get(userId="me", messageId=item["message_id"], id=item["attachment_id"])
+        for index, item in enumerate(items)
+    }
+    responses, errors = run_batch(gmail_service, requests, get_credentials(SCOPES))
 
-@mcp.tool()
-def gmail_get_thread(thread_id: str, format: str = "full", ctx: Context = None) -> Dict[str, Any]:
-    return _get_thread_impl(thread_id=thread_id, format=format)
+    return [
+        {**item, "error": errors[str(index)]} if str(index) in errors else responses.get(str(index))
+        for index, item in enumerate(items)
+    ]
 
 
-@mcp.tool()
-def gmail_list_threads(query: Optional[str] = None, label_ids: Optional[List[str]] = None, include_spam_trash: bool = False, page_size: int = 20, page_token: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _list_threads_impl(query=query, label_ids=label_ids, include_spam_trash=include_spam_trash, page_size=page_size, page_token=page_token)
+@mcp.tool(structured_output=False)
+async def gmail_batch_get(message_ids: List[str], format: str = "full", fields: Optional[str] = None, ctx: Context = None) -> Dict[str, Any]:
+    """Fetch several messages at once, packing up to 100 gets into each batch call.
 
+    Messages come back in the order of message_ids; a message that could not be
+    fetched is replaced by {"id": message_id, "error": reason}.
+    """
+    gmail_service = ctx.request_context.lifespan_context.gmail_service
+    messages = await asyncio.to_thread(_run_batch_get, gmail_service, message_ids, format, fields)
+    return {"messages": messages}
 
-@mcp.tool()
-def gmail_batch_modify(message_ids: List[str], add_label_ids: Optional[List[str]] = None, remove_label_ids: Optional[List[str]] = None, ctx: Context = None) -> Dict[str, Any]:
-    return _batch_modify_impl(message_ids=message_ids, add_label_ids=add_label_ids, remove_label_ids=remove_label_ids)
 
+@mcp.tool(structured_output=False)
+async def gmail_batch_get_attachments(items: List[Dict[str, str]], ctx: Context = None) -> Dict[str, Any]:
+    """Fetch several attachments at once; items are {"message_id", "attachment_id"}.
 
-@mcp.tool()
-def gmail_batch_delete(message_ids: List[str], ctx: Context = None) -> Dict[str, Any]:
-    return _batch_delete_impl(message_ids=message_ids)
+    Attachments come back in the order of items with their data still base64url
+    encoded; one that could not be fetched is replaced by
+    {"message_id", "attachment_id", "error"}.
+    """
+    gmail_service = ctx.request_context.lifespan_context.gmail_service
+    attachments = await asyncio.to_thread(_run_batch_get_attachments, gmail_service, items)
+    return {"attachments": attachments}
 
 
 def main():
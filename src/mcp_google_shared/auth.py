@@ -2,17 +2,19 @@
 Authentication utilities for Google MCPs
 """
 
+import asyncio
 import base64
-import json
+import contextlib
+import functools
 import os
-from typing import List, Any, Optional
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Any, Optional, Tuple
 import logging
 
-from google.oauth2.credentials import Credentials
-from google.oauth2 import service_account
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import orjson
 
 # Default paths
 CREDENTIALS_CONFIG = os.environ.get('CREDENTIALS_CONFIG')
@@ -20,11 +22,129 @@ TOKEN_PATH = os.environ.get('TOKEN_PATH', 'token.json')
 CREDENTIALS_PATH = os.environ.get('CREDENTIALS_PATH', 'credentials.json')
 SERVICE_ACCOUNT_PATH = os.environ.get('SERVICE_ACCOUNT_PATH', 'service_account.json')
 
+# Refresh cached credentials once they are this close to expiring
+REFRESH_MARGIN_SECONDS = 300
+
+# Google caps a batch at 100 sub-requests
+BATCH_LIMIT = 100
+
 logger = logging.getLogger(__name__)
 
-def get_credentials(scopes: List[str]) -> Any:
+# Process-wide credentials, keyed by sorted scope tuple
+_CREDS_CACHE: Dict[Tuple[str, ...], Any] = {}
+_CREDS_LOCK = threading.Lock()
+
+# Process-wide built services, keyed by (api_name, api_version, sorted scopes)
+_SERVICE_CACHE: Dict[Tuple[str, str, Tuple[str, ...]], Any] = {}
+_SERVICE_LOCK = threading.Lock()
+
+@functools.lru_cache(maxsize=1)
+def service_account_info() -> Dict[str, Any]:
+    """
+    Load and parse the service account key at SERVICE_ACCOUNT_PATH.
+    
+    The result is cached so every service sharing the process reuses the
+    same parsed key instead of re-reading the file.
+    
+    Returns:
+        Service account info dict, suitable for from_service_account_info
+    """
+    with open(SERVICE_ACCOUNT_PATH, "rb") as f:
+        return orjson.loads(f.read())
+
+def _seconds_until_expiry(creds: Any) -> Optional[float]:
+    """Seconds before creds expire, or None if they carry no expiry yet"""
+    if not creds.expiry:
+        return None
+    # google-auth keeps expiry as a naive UTC datetime
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return (creds.expiry - now).total_seconds()
+
+def _needs_refresh(creds: Any) -> bool:
+    remaining = _seconds_until_expiry(creds)
+    return remaining is not None and remaining < REFRESH_MARGIN_SECONDS
+
+def _save_token(creds: Any) -> None:
+    """
+    Persist OAuth user credentials to TOKEN_PATH.
+    
+    The token is written to a temporary file, fsynced and moved into place,
+    so servers sharing the token file never read a partial write.
+    """
+    # A unique temporary file per writer, so concurrent refreshes never interleave
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(TOKEN_PATH)), prefix=f".{os.path.basename(TOKEN_PATH)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tf:
+            tf.write(creds.to_json().encode())
+            tf.flush()
+            os.fsync(tf.fileno())
+        os.replace(tmp_path, TOKEN_PATH)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+    logger.info(f"Saved OAuth credentials to {TOKEN_PATH}")
+
+def refresh_credentials(creds: Any) -> None:
     """
-    Get OAuth credentials using various methods.
+    Refresh credentials and persist them if they came from the OAuth token.
+    
+    Args:
+        creds: Google Auth credentials object
+    """
+    from google.oauth2.credentials import Credentials
+    from google.auth.transport.requests import Request
+
+    creds.refresh(Request())
+    logger.info("Refreshed Google credentials")
+    if isinstance(creds, Credentials):
+        try:
+            _save_token(creds)
+        except Exception as e:
+            logger.warning(f"Failed to save OAuth token: {e}")
+
+def _refresh_if_needed(creds: Any) -> None:
+    with _CREDS_LOCK:
+        if not creds.valid or _needs_refresh(creds):
+            refresh_credentials(creds)
+
+class WarmCredentials:
+    """
+    Keep credentials fresh from a background task for the life of a server.
+    
+    Used as an async context manager around a lifespan's yield: it sleeps
+    until REFRESH_MARGIN_SECONDS before expiry, refreshes the credentials in
+    a worker thread and repeats, so tool calls never pay for a refresh.
+    The credentials object itself is shared and handed out unchanged.
+    """
+
+    def __init__(self, creds: Any):
+        self.creds = creds
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> Any:
+        self._task = asyncio.create_task(self._refresher())
+        return self.creds
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+    async def _refresher(self) -> None:
+        while True:
+            remaining = _seconds_until_expiry(self.creds)
+            delay = 60 if remaining is None else max(60, remaining - REFRESH_MARGIN_SECONDS)
+            await asyncio.sleep(delay)
+            try:
+                await asyncio.to_thread(_refresh_if_needed, self.creds)
+            except Exception as e:
+                logger.warning(f"Background credential refresh failed: {e}")
+
+def _load_credentials(scopes: Tuple[str, ...]) -> Any:
+    """
+    Load credentials using various methods.
     
     Tries in this order:
     1. Use base64 encoded credentials from CREDENTIALS_CONFIG env var
@@ -32,18 +152,23 @@ def get_credentials(scopes: List[str]) -> Any:
     3. Use OAuth flow from CREDENTIALS_PATH/TOKEN_PATH
     
     Args:
-        scopes: List of OAuth scopes needed
+        scopes: Tuple of OAuth scopes needed
         
     Returns:
         Google Auth credentials object or None if all auth methods fail
     """
+    # Imported lazily so importing this module stays cheap
+    from google.oauth2.credentials import Credentials
+    from google.oauth2 import service_account
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     creds = None
     
     # 1. Try credentials from environment var (base64 encoded)
     if CREDENTIALS_CONFIG:
         try:
             creds = service_account.Credentials.from_service_account_info(
-                json.loads(base64.b64decode(CREDENTIALS_CONFIG)), scopes)
+                orjson.loads(base64.b64decode(CREDENTIALS_CONFIG)), scopes=scopes)
             logger.info("Using credentials from CREDENTIALS_CONFIG environment variable")
             return creds
         except Exception as e:
@@ -52,8 +177,8 @@ def get_credentials(scopes: List[str]) -> Any:
     # 2. Try service account auth
     if SERVICE_ACCOUNT_PATH and os.path.exists(SERVICE_ACCOUNT_PATH):
         try:
-            creds = service_account.Credentials.from_service_account_file(
-                SERVICE_ACCOUNT_PATH, scopes=scopes)
+            creds = service_account.Credentials.from_service_account_info(
+                service_account_info(), scopes=scopes)
             logger.info(f"Using service account authentication from {SERVICE_ACCOUNT_PATH}")
             return creds
         except Exception as e:
@@ -62,8 +187,8 @@ def get_credentials(scopes: List[str]) -> Any:
     # 3. Try OAuth flow with saved token
     if os.path.exists(TOKEN_PATH):
         try:
-            with open(TOKEN_PATH, "r") as tf:
-                creds = Credentials.from_authorized_user_info(json.load(tf), scopes)
+            creds = Credentials.from_authorized_user_info(
+                orjson.loads(Path(TOKEN_PATH).read_bytes()), scopes)
             logger.info(f"Loaded OAuth credentials from {TOKEN_PATH}")
         except Exception as e:
             logger.warning(f"Failed to load OAuth token: {e}")
@@ -72,8 +197,7 @@ def get_credentials(scopes: List[str]) -> Any:
     try:
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-                logger.info("Refreshed OAuth token")
+                refresh_credentials(creds)
             else:
                 # Interactive OAuth flow - requires browser
                 if not os.path.exists(CREDENTIALS_PATH):
@@ -83,41 +207,213 @@ def get_credentials(scopes: List[str]) -> Any:
                 flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, scopes)
                 creds = flow.run_local_server(port=0)
                 logger.info("Completed OAuth flow with browser sign-in")
-            
-            # Save the credentials for next run
-            try:
-                with open(TOKEN_PATH, "w") as tf:
-                    tf.write(creds.to_json())
-                logger.info(f"Saved OAuth credentials to {TOKEN_PATH}")
-            except Exception as e:
-                logger.warning(f"Failed to save OAuth token: {e}")
+                
+                # Save the credentials for next run
+                try:
+                    _save_token(creds)
+                except Exception as e:
+                    logger.warning(f"Failed to save OAuth token: {e}")
     except Exception as e:
         logger.error(f"Auth error: {e}")
         return None
         
     return creds
 
-def create_service(api_name: str, api_version: str, scopes: List[str]) -> Optional[Any]:
+def get_credentials(scopes: Iterable[str]) -> Any:
+    """
+    Get credentials for a set of scopes, shared across the whole process.
+    
+    Credentials are cached per scope set, so servers hosted in the same
+    process authenticate once and reuse the same object. Cached credentials
+    are refreshed proactively once they are within REFRESH_MARGIN_SECONDS
+    of expiring, instead of waiting for a request to find them invalid.
+    
+    Args:
+        scopes: OAuth scopes needed
+        
+    Returns:
+        Google Auth credentials object or None if all auth methods fail
+    """
+    key = tuple(sorted(scopes))
+    creds = _CREDS_CACHE.get(key)
+    if creds is not None and not _needs_refresh(creds):
+        return creds
+
+    with _CREDS_LOCK:
+        # Another thread may have loaded or refreshed them while we waited
+        creds = _CREDS_CACHE.get(key)
+        if creds is None:
+            creds = _load_credentials(key)
+            if creds is None:
+                return None
+            _CREDS_CACHE[key] = creds
+        if _needs_refresh(creds):
+            try:
+                refresh_credentials(creds)
+            except Exception as e:
+                logger.warning(f"Proactive credential refresh failed: {e}")
+        return creds
+
+def authorized_http(creds: Any) -> Any:
+    """
+    Create an authorized HTTP object for the calling thread.
+    
+    httplib2.Http objects are not thread-safe, so work run off the event
+    loop on a shared service passes one of these per call instead of using
+    the service's own http. Over HTTP/2 they all share one connection pool.
+    
+    Args:
+        creds: Google Auth credentials object
+        
+    Returns:
+        google_auth_httplib2.AuthorizedHttp wrapping a fresh transport
+    """
+    import google_auth_httplib2
+    from mcp_google_shared.transport import Http2Transport, http2_available
+
+    if http2_available():
+        transport = Http2Transport()
+    else:
+        import httplib2
+        transport = httplib2.Http()
+    return google_auth_httplib2.AuthorizedHttp(creds, http=transport)
+
+def create_service(api_name: str, api_version: str, scopes: Iterable[str]) -> Optional[Any]:
     """
     Create a Google API service with proper authentication.
     
+    Built services are cached per API, version and scope set, so servers
+    hosted in the same process share one service object and only parse
+    each discovery document once.
+    
     Args:
         api_name: Name of the Google API (e.g., 'drive', 'sheets')
         api_version: API version (e.g., 'v3')
-        scopes: List of OAuth scopes needed
+        scopes: OAuth scopes needed
         
     Returns:
         Google API service or None if authentication fails
     """
-    creds = get_credentials(scopes)
+    key = (api_name, api_version, tuple(sorted(scopes)))
+    service = _SERVICE_CACHE.get(key)
+    if service is not None:
+        return service
+
+    creds = get_credentials(key[2])
     if not creds:
         logger.error(f"Failed to get valid credentials for {api_name}")
         return None
         
-    try:
-        service = build(api_name, api_version, credentials=creds)
+    from googleapiclient.discovery import build
+    from googleapiclient.errors import UnknownApiNameOrVersion
+    from mcp_google_shared.discovery import DiscoveryCache
+    from mcp_google_shared.transport import http2_available
+
+    if http2_available():
+        # Share one multiplexed HTTP/2 connection pool across all services
+        auth_kwargs = {"http": authorized_http(creds)}
+    else:
+        auth_kwargs = {"credentials": creds}
+
+    with _SERVICE_LOCK:
+        service = _SERVICE_CACHE.get(key)
+        if service is not None:
+            return service
+        try:
+            try:
+                # Use the discovery documents bundled with googleapiclient
+                service = build(api_name, api_version, **auth_kwargs,
+                                static_discovery=True, cache_discovery=False)
+            except UnknownApiNameOrVersion:
+                # Not bundled: fetch it once and serve later starts from disk
+                service = build(api_name, api_version, **auth_kwargs,
+                                static_discovery=False, cache_discovery=True,
+                                cache=DiscoveryCache())
+        except Exception as e:
+            logger.error(f"Failed to create {api_name} service: {e}")
+            return None
+        _SERVICE_CACHE[key] = service
         logger.info(f"Created {api_name} service")
         return service
-    except Exception as e:
-        logger.error(f"Failed to create {api_name} service: {e}")
-        return None 
\ No newline at end of file
+
+def run_batch(service: Any, requests: Dict[str, Any], creds: Any = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Execute API requests through batch calls of up to BATCH_LIMIT each.
+    
+    Batch calls only refresh credentials after the server has rejected them,
+    so when creds are given they are refreshed up front if they are invalid
+    or close to expiring. Sub-requests that still come back 401 are refreshed
+    and retried by googleapiclient itself. With creds, the batch calls also
+    go out on their own authorized_http, so batches run from worker threads
+    never share the service's http with another thread.
+    
+    Args:
+        service: Google API service the requests were built from
+        requests: Requests keyed by request id
+        creds: Credentials the service authenticates with
+        
+    Returns:
+        (responses, errors): responses and error messages keyed by request id
+    """
+    http = None
+    if creds is not None:
+        _refresh_if_needed(creds)
+        http = authorized_http(creds)
+
+    responses: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+
+    def callback(request_id: str, response: Any, exception: Optional[Exception]) -> None:
+        if exception is not None:
+            errors[request_id] = str(exception)
+        else:
+            responses[request_id] = response
+
+    items = list(requests.items())
+    for start in range(0, len(items), BATCH_LIMIT):
+        batch = service.new_batch_http_request(callback=callback)
+        for request_id, request in items[start:start + BATCH_LIMIT]:
+            batch.add(request, request_id=request_id)
+        batch.execute(http=http)
+    return responses, errors
+
+def make_lifespan(
+    services_spec: Iterable[Tuple[str, str, str, Iterable[str]]],
+    context_cls: Callable[..., Any],
+    **context_kwargs: Any,
+) -> Callable[[Any], Any]:
+    """
+    Build a FastMCP lifespan that creates Google services and yields a context.
+    
+    Args:
+        services_spec: (context field, api_name, api_version, scopes) per service
+        context_cls: Lifespan context class; built services are passed by field name
+        **context_kwargs: Extra fields for the context, e.g. folder_id
+        
+    Returns:
+        Async context manager function suitable for FastMCP(lifespan=...)
+    """
+    services_spec = tuple(services_spec)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(server: Any):
+        # Loading credentials and building services block on disk, network and
+        # possibly a browser sign-in, so keep them off the event loop
+        built = await asyncio.gather(*(
+            asyncio.to_thread(create_service, api_name, api_version, scopes)
+            for _, api_name, api_version, scopes in services_spec
+        ))
+        services = {spec[0]: service for spec, service in zip(services_spec, built)}
+        missing = [field for field, service in services.items() if not service]
+        if missing:
+            raise RuntimeError(f"Failed to create Google services: {', '.join(missing)}")
+
+        # Refresh each distinct credential set in the background while the server runs
+        scope_sets = {tuple(sorted(scopes)) for *_, scopes in services_spec}
+        async with contextlib.AsyncExitStack() as stack:
+            for scopes in scope_sets:
+                creds = await asyncio.to_thread(get_credentials, scopes)
+                await stack.enter_async_context(WarmCredentials(creds))
+            yield context_cls(**services, **context_kwargs)
+
+    return lifespan
@@ -0,0 +1,49 @@
+"""
+On-disk cache for Google API discovery documents
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _default_cache_dir() -> Path:
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'mcp-google' / 'discovery'
+
+class DiscoveryCache:
+    """
+    googleapiclient discovery cache backed by files on disk.
+
+    Implements the get/set interface of googleapiclient's discovery_cache.base.Cache,
+    so a discovery document fetched once is served from the local disk (and
+    the page cache) on every later process start.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else _default_cache_dir()
+
+    def _path(self, url: str) -> Path:
+        # Discovery URLs carry the API name and version, so hashing them is enough
+        return self.cache_dir / f"{hashlib.sha256(url.encode()).hexdigest()[:32]}.json"
+
+    def get(self, url: str) -> Optional[bytes]:
+        try:
+            return self._path(url).read_bytes()
+        except OSError:
+            return None
+
+    def set(self, url: str, content) -> None:
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        path = self._path(url)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache discovery document for {url}: {e}")
@@ -0,0 +1,72 @@
+"""
+Helpers for registering FastMCP tools that forward to service implementations
+"""
+
+import ast
+import functools
+import importlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from mcp.server.fastmcp import FastMCP, Context
+
+# Names the generated signatures may refer to
+_SIGNATURE_GLOBALS = {
+    "Any": Any,
+    "Dict": Dict,
+    "List": List,
+    "Optional": Optional,
+    "Context": Context,
+}
+
+def make_impl_loader(module_name: str) -> Callable[[str], Callable[..., Dict[str, Any]]]:
+    """
+    Build a loader that resolves tool implementations from module_name by name.
+
+    The module is imported on the first lookup rather than with the server,
+    and every resolved function is cached.
+
+    Args:
+        module_name: Dotted path of the service implementation module
+
+    Returns:
+        Function mapping an implementation name to the function itself
+    """
+    @functools.lru_cache(maxsize=None)
+    def impl(name: str) -> Callable[..., Dict[str, Any]]:
+        return getattr(importlib.import_module(module_name), name)
+
+    return impl
+
+def _param_names(params: str) -> List[str]:
+    args = ast.parse(f"def _({params}): pass").body[0].args
+    return [arg.arg for arg in args.posonlyargs + args.args + args.kwonlyargs]
+
+def register_forwarders(
+    mcp: FastMCP,
+    impl: Callable[[str], Callable[..., Dict[str, Any]]],
+    tools: Iterable[Tuple[str, str, str]],
+) -> None:
+    """
+    Register tools that pass their arguments straight to an implementation.
+
+    Each entry is (tool_name, impl_name, params), where params is the tool's
+    parameter list as Python source, e.g. 'message_id: str, format: str = "full"'.
+    A plain function with that signature plus a trailing ctx parameter is
+    compiled for each entry, so FastMCP sees the same signature it would for
+    a hand-written tool, and calls impl(impl_name) with every argument by name.
+
+    Args:
+        mcp: Server to register the tools on
+        impl: Loader resolving an implementation function by name
+        tools: Tool table entries
+    """
+    for tool_name, impl_name, params in tools:
+        kwargs = ", ".join(f"{name}={name}" for name in _param_names(params))
+        signature = ", ".join(filter(None, [params, "ctx: Context = None"]))
+        source = (
+            f"def {tool_name}({signature}) -> Dict[str, Any]:\n"
+            f"    return _impl({impl_name!r})({kwargs})\n"
+        )
+        namespace = dict(_SIGNATURE_GLOBALS, _impl=impl)
+        exec(compile(source, f"<{tool_name}>", "exec"), namespace)
+        mcp.tool(structured_output=False)(namespace[tool_name])
@@ -0,0 +1,86 @@
+"""
+HTTP/2 transport for googleapiclient services
+"""
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+import httplib2
+
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+def http2_available() -> bool:
+    return httpx is not None
+
+def _shared_client() -> Any:
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = httpx.Client(
+                http2=True,
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                limits=httpx.Limits(max_keepalive_connections=32),
+            )
+            logger.info("Created shared HTTP/2 client")
+        return _CLIENT
+
+class Http2Transport:
+    """
+    httplib2.Http stand-in backed by one shared httpx HTTP/2 client.
+
+    httplib2 speaks only HTTP/1.1 and its Http objects are not thread-safe.
+    This exposes the same request() interface on a process-wide httpx client,
+    so concurrent calls multiplex over one connection per Google host. Wrap
+    it in google_auth_httplib2.AuthorizedHttp and pass it to build(http=...).
+    """
+
+    def __init__(self, client: Optional[Any] = None):
+        self.client = client or _shared_client()
+        self.timeout = None
+        self.redirect_codes = httplib2.REDIRECT_CODES
+
+    def request(
+        self,
+        uri: str,
+        method: str = "GET",
+        body: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        redirections: int = httplib2.DEFAULT_MAX_REDIRECTS,
+        connection_type: Any = None,
+    ) -> Tuple[httplib2.Response, bytes]:
+        if hasattr(body, "read"):
+            body = body.read()
+        try:
+            # 308 without a Location header (resumable upload progress) is not followed
+            response = self.client.request(
+                method, uri, content=body, headers=headers, follow_redirects=redirections > 0)
+        except httpx.TimeoutException as e:
+            # googleapiclient retries on the socket-level errors httplib2 raises
+            raise TimeoutError(str(e)) from e
+        except httpx.TransportError as e:
+            raise ConnectionError(str(e)) from e
+
+        content = response.content
+        info = {key.lower(): value for key, value in response.headers.items()}
+        if "content-encoding" in info:
+            # httpx already decoded the body, as httplib2 would have
+            info["-content-encoding"] = info.pop("content-encoding")
+            info["content-length"] = str(len(content))
+        info["status"] = str(response.status_code)
+        resp = httplib2.Response(info)
+        resp.reason = response.reason_phrase
+        return resp, content
+
+    def close(self) -> None:
+        # The client is shared process-wide; nothing to release per service
+        pass
@@ -3,12 +3,13 @@
 Test client for basic_fastmcp_server.py
 """
 
-import json
 import asyncio
 import logging
 import sys
 import subprocess
-from typing import Dict, Any
+from typing import Dict, List, Any
+
+import orjson
 
 # Configure logging
 logging.basicConfig(
@@ -17,19 +18,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger("test_client")
 
-async def send_request(proc, request_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Send a request to the server and get the response"""
-    request_str = json.dumps(request_data) + "\n"
-    logger.info(f"Sending: {request_str.strip()}")
+async def send_requests(proc, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pipeline several requests to the server and collect their responses
+
+    All requests go out in a single write, then one response line is read per
+    request. Responses are matched back to their requests by id.
+    """
+    payload = b"".join(orjson.dumps(request_data) + b"\n" for request_data in requests)
+    logger.info(f"Sending {len(requests)} request(s): {payload.decode().strip()}")
     
-    proc.stdin.write(request_str.encode('utf-8'))
+    proc.stdin.write(payload)
     await proc.stdin.drain()
     
-    response_line = await proc.stdout.readline()
-    response = json.loads(response_line.decode('utf-8'))
-    logger.info(f"Received: {response}")
+    responses = {}
+    for _ in requests:
+        response = orjson.loads(await proc.stdout.readline())
+        logger.info(f"Received: {response}")
+        responses[response.get("id")] = response
     
-    return response
+    return [responses.get(request_data.get("id")) for request_data in requests]
+
+async def send_request(proc, request_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Send a request to the server and get the response"""
+    return (await send_requests(proc, [request_data]))[0]
 
 async def test_server():
     """Run tests against the server"""
@@ -54,9 +65,6 @@ async def test_server():
             "id": 1
         }
         
-        echo_response = await send_request(proc, echo_request)
-        assert echo_response.get("result") == "Echo: Hello, FastMCP!", "Echo test failed"
-        
         # Test add tool
         add_request = {
             "jsonrpc": "2.0",
@@ -65,7 +73,8 @@ async def test_server():
             "id": 2
         }
         
-        add_response = await send_request(proc, add_request)
+        echo_response, add_response = await send_requests(proc, [echo_request, add_request])
+        assert echo_response.get("result") == "Echo: Hello, FastMCP!", "Echo test failed"
         assert add_response.get("result") == 8, "Add test failed"
         
         logger.info("All tests passed!")
@@ -4,107 +4,142 @@ Test client for the FastMCP Sheets server using HTTP requests
 """
 
 import os
-import json
 import asyncio
+import contextlib
 import logging
-import requests
+import httpx
 import subprocess
 import time
-from typing import Dict, Any
 
-# Configure logging
+import orjson
+
+# Configure logging; timestamps and logger names only when debugging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s' if os.environ.get("TEST_DEBUG") else '%(message)s'
 )
 logger = logging.getLogger("sheets_test_client")
 
+# The server is started on this port and every request targets it
+PORT = int(os.environ.get("TEST_PORT", "8000"))
+BASE = f"http://localhost:{PORT}"
+
+JSON_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json"
+}
+
+# Connection pool shared by the SSE stream and the JSON-RPC POSTs
+LIMITS = httpx.Limits(max_connections=16, max_keepalive_connections=4)
+
+# How long to keep retrying the SSE connection while the server starts
+STARTUP_TIMEOUT = 10.0
+
+# SSE line announcing the message endpoint for this session
+SESSION_PREFIX = b'data: /messages/?session_id='
+
+# Static JSON-RPC payloads, serialized once
+CREATE_PAYLOAD = orjson.dumps({
+    "jsonrpc": "2.0",
+    "method": "create_spreadsheet",
+    "params": {
+        "title": "Test Spreadsheet",
+        "sheets": ["Sheet1", "Sheet2"]
+    },
+    "id": 1
+})
+
+GET_PAYLOAD = orjson.dumps({
+    "jsonrpc": "2.0",
+    "method": "get_spreadsheet",
+    "params": {
+        "spreadsheet_id": "1234567890abcdefgh"
+    },
+    "id": 2
+})
+
 def start_server():
     """Start the server in the background"""
     logger.info("Starting sheets server...")
     cmd = ["python3", "fast_sheets_server.py"]
     env = os.environ.copy()
-    env["PORT"] = "8001"
+    env["PORT"] = str(PORT)
     
-    # Start the server process and return it
+    # Start the server process; nothing reads its output, so discard it
+    # rather than let a full pipe block the server
     proc = subprocess.Popen(
         cmd,
         env=env,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
     )
     
-    # Give the server time to start
-    time.sleep(2)
     return proc
 
-def check_server_health():
-    """Check if the server is up by accessing the SSE endpoint"""
-    url = "http://localhost:8000/sse"
-    logger.info(f"Checking server health at {url}")
-    
+def stop_server(proc):
+    """Stop the server, killing it if it ignores SIGTERM"""
+    proc.terminate()
     try:
-        response = requests.get(url, stream=True)
-        if response.status_code == 200:
-            logger.info("Server is up and running!")
-            # Close the stream
-            response.close()
-            return True
-        else:
-            logger.error(f"Server health check failed: {response.status_code}")
-            return False
-    except Exception as e:
-        logger.error(f"Cannot connect to server: {e}")
-        return False
+        proc.wait(timeout=3)
+    except subprocess.TimeoutExpired:
+        logger.warning("Server did not exit after SIGTERM, killing it")
+        proc.kill()
+        proc.wait(timeout=1)
 
-def get_sse_session():
-    """Connect to the SSE endpoint and get a session ID"""
-    url = "http://localhost:8000/sse"
-    logger.info(f"Connecting to SSE endpoint at {url}")
-    
+async def open_sse_stream(client, proc):
+    """Open the SSE stream, retrying until the server accepts connections
+
+    Connecting is the readiness check, so there is no separate health probe.
+    """
+    logger.info(f"Connecting to SSE endpoint at {BASE}/sse")
+    request = client.build_request("GET", "/sse", timeout=httpx.Timeout(3.0, connect=1.0))
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while True:
+        try:
+            return await client.send(request, stream=True)
+        except httpx.ConnectError:
+            if proc.poll() is not None:
+                raise RuntimeError(f"Server exited with code {proc.returncode} before accepting connections")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server did not start listening on port {PORT}")
+            await asyncio.sleep(0.02)
+
+@contextlib.asynccontextmanager
+async def sse_session(client, proc):
+    """Yield the session ID of a new SSE stream, or None if there is none
+
+    The stream stays open until the block exits, since the server drops
+    the session as soon as its stream closes. Each read is bounded, so a
+    silent server raises httpx.ReadTimeout instead of hanging the test.
+    """
+    response = await open_sse_stream(client, proc)
     try:
-        response = requests.get(url, stream=True)
-        if response.status_code == 200:
-            # Read the first event to get the session ID
-            for line in response.iter_lines():
-                if line:
-                    decoded_line = line.decode('utf-8')
-                    if decoded_line.startswith('data: /messages/?session_id='):
-                        session_id = decoded_line.split('=')[1]
-                        logger.info(f"Got session ID: {session_id}")
-                        response.close()
-                        return session_id
-            
-            response.close()
-            logger.error("Could not find session ID in SSE response")
-            return None
-        else:
+        if response.status_code != 200:
             logger.error(f"SSE connection failed: {response.status_code}")
-            return None
-    except Exception as e:
-        logger.error(f"Error connecting to SSE: {e}")
-        return None
+            yield None
+            return
+        
+        logger.info("Server is up and running!")
+        # Read the first event to get the session ID; only the matching line is decoded
+        buffer = b""
+        async for chunk in response.aiter_bytes():
+            *lines, buffer = (buffer + chunk).split(b"\n")
+            for line in lines:
+                if line.startswith(SESSION_PREFIX):
+                    session_id = line[len(SESSION_PREFIX):].rstrip(b"\r").decode('ascii')
+                    logger.info(f"Got session ID: {session_id}")
+                    yield session_id
+                    return
+        
+        logger.error("Could not find session ID in SSE response")
+        yield None
+    finally:
+        await response.aclose()
 
-def test_create_spreadsheet(session_id):
+async def test_create_spreadsheet(client, msg_url):
     """Test the create_spreadsheet tool via HTTP"""
-    url = f"http://localhost:8000/messages/?session_id={session_id}"
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
-    
-    data = {
-        "jsonrpc": "2.0",
-        "method": "create_spreadsheet",
-        "params": {
-            "title": "Test Spreadsheet",
-            "sheets": ["Sheet1", "Sheet2"]
-        },
-        "id": 1
-    }
-    
-    logger.info(f"Sending request to {url}")
-    response = requests.post(url, headers=headers, json=data)
+    logger.info(f"Sending request to {msg_url}")
+    response = await client.post(msg_url, content=CREATE_PAYLOAD)
     
     # 202 Accepted is a success for async processing
     if response.status_code in [200, 202]:
@@ -114,25 +149,10 @@ def test_create_spreadsheet(session_id):
         logger.error(f"Error: {response.status_code}, {response.text}")
         return False
 
-def test_get_spreadsheet(session_id):
+async def test_get_spreadsheet(client, msg_url):
     """Test the get_spreadsheet tool via HTTP"""
-    url = f"http://localhost:8000/messages/?session_id={session_id}"
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
-    
-    data = {
-        "jsonrpc": "2.0",
-        "method": "get_spreadsheet",
-        "params": {
-            "spreadsheet_id": "1234567890abcdefgh"
-        },
-        "id": 2
-    }
-    
-    logger.info(f"Sending request to {url}")
-    response = requests.post(url, headers=headers, json=data)
+    logger.info(f"Sending request to {msg_url}")
+    response = await client.post(msg_url, content=GET_PAYLOAD)
     
     # 202 Accepted is a success for async processing
     if response.status_code in [200, 202]:
@@ -142,34 +162,37 @@ def test_get_spreadsheet(session_id):
         logger.error(f"Error: {response.status_code}, {response.text}")
         return False
 
+async def run_tests(client, msg_url):
+    """Send both tool calls concurrently"""
+    results = await asyncio.gather(
+        test_create_spreadsheet(client, msg_url),
+        test_get_spreadsheet(client, msg_url)
+    )
+    return all(results)
+
+async def main(proc):
+    """Get a session and run the tests over one shared client"""
+    async with httpx.AsyncClient(base_url=BASE, headers=JSON_HEADERS, limits=LIMITS) as client, \
+            sse_session(client, proc) as session_id:
+        if session_id is not None:
+            # Run the tests against this session's message endpoint
+            msg_url = f"/messages/?session_id={session_id}"
+            if await run_tests(client, msg_url):
+                logger.info("All tests passed!")
+            else:
+                logger.error("Some tests failed")
+        else:
+            logger.error("Failed to get session ID, skipping tests")
+
 if __name__ == "__main__":
     # Start the server
     server_proc = start_server()
     
     try:
-        # First check if the server is healthy
-        if check_server_health():
-            # Get a session ID
-            session_id = get_sse_session()
-            
-            if session_id:
-                # Run the tests
-                create_result = test_create_spreadsheet(session_id)
-                get_result = test_get_spreadsheet(session_id)
-                
-                if create_result and get_result:
-                    logger.info("All tests passed!")
-                else:
-                    logger.error("Some tests failed")
-            else:
-                logger.error("Failed to get session ID, skipping tests")
-        else:
-            logger.error("Server health check failed, skipping tests")
-            
+        asyncio.run(main(server_proc))
     except Exception as e:
         logger.error(f"Error during testing: {e}", exc_info=True)
     finally:
         # Terminate the server
         logger.info("Terminating server...")
-        server_proc.terminate()
-        server_proc.wait() 
\ No newline at end of file
+        stop_server(server_proc)